@@ -5,206 +5,409 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
-import os
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, RedirectResponse, Response
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import orjson
+import secrets
+import sys
+from collections import defaultdict
+from email.utils import formatdate, parsedate
+from functools import lru_cache
+from types import MappingProxyType
 from pathlib import Path
 
+STATIC_DIR = (Path(__file__).parent / "static").resolve()
+
+# Static assets held in memory:
+# relative path -> (content, content type, ETag, Last-Modified)
+static_bytes = {}
+STATIC_CACHE_CONTROL = "public, max-age=3600"
+
+
+def load_static_files():
+    """Read every file under STATIC_DIR into static_bytes"""
+    static_bytes.clear()
+    for path in STATIC_DIR.rglob("*"):
+        if not path.is_file():
+            continue
+        content = path.read_bytes()
+        ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        etag = '"' + hashlib.blake2b(content, digest_size=8).hexdigest() + '"'
+        last_modified = formatdate(path.stat().st_mtime, usegmt=True)
+        static_bytes[path.relative_to(STATIC_DIR).as_posix()] = (
+            content, ctype, etag, last_modified)
+
+
+# Loaded once at import rather than in a lifespan hook, so hosts that skip
+# lifespan (a bare TestClient, mounting this app as a sub-app) still serve
+# assets. A process restart (e.g. uvicorn --reload) picks up edits.
+load_static_files()
+
+
 app = FastAPI(title="Mergington High School API",
-              description="API for viewing and signing up for extracurricular activities")
+              description="API for viewing and signing up for extracurricular activities",
+              default_response_class=ORJSONResponse)
 
-# Mount the static files directory
-current_dir = Path(__file__).parent
-app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
-          "static")), name="static")
+# Compress larger responses such as the /activities listing
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=6)
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from typing import Literal, Optional
+
+# Valid {user_type} path values; anything else is rejected with a 422
+UserType = Literal["students", "clubs"]
 
 # In-memory user database (students and clubs)
 users = {
-    "students": {},  # email: {"name": ..., "password": ..., "profile": {...}}
-    "clubs": {}      # email: {"name": ..., "password": ..., "profile": {...}}
+    sys.intern("students"): {},  # email: {"name": ..., "password": ..., "profile": {...}}
+    sys.intern("clubs"): {}      # email: {"name": ..., "password": ..., "profile": {...}}
 }
 
+_ERR_INVALID_USER_TYPE = HTTPException(status_code=400, detail="Invalid user type")
+
+
+@lru_cache(maxsize=2)
+def _users_bucket(user_type: str) -> dict:
+    """Return the user dict for a user type; the buckets are never replaced"""
+    bucket = users.get(user_type)
+    if bucket is None:
+        raise _ERR_INVALID_USER_TYPE.with_traceback(None)
+    return bucket
+
+
+# Key for password digests; users live in memory, so a per-process key is enough
+_PASSWORD_KEY = secrets.token_bytes(32)
+
+
+def hash_password(password: str) -> bytes:
+    """Return the keyed blake2b digest stored in place of a plaintext password"""
+    return hashlib.blake2b(password.encode(), digest_size=16, key=_PASSWORD_KEY).digest()
+
+
+def check_password(password: str, digest: bytes) -> bool:
+    """Compare a candidate password against a stored digest in constant time"""
+    return hmac.compare_digest(hash_password(password), digest)
+
+
 # In-memory activity database
 activities = {
-    class UserRegister(BaseModel):
-        email: str
-        name: str
-        password: str
-
-    class UserLogin(BaseModel):
-        email: str
-        password: str
-
-    class UserProfile(BaseModel):
-        name: Optional[str] = None
-        bio: Optional[str] = None
-
-    # --- Authentication & Profile Endpoints ---
-    @app.post("/register/{user_type}")
-    def register_user(user_type: str, user: UserRegister):
-        if user_type not in users:
-            raise HTTPException(status_code=400, detail="Invalid user type")
-        if user.email in users[user_type]:
-            raise HTTPException(status_code=400, detail="User already exists")
-        users[user_type][user.email] = {
-            "name": user.name,
-            "password": user.password,
-            "profile": {"name": user.name, "bio": ""}
-        }
-        return {"message": f"{user_type.title()} registered successfully"}
-
-    @app.post("/login/{user_type}")
-    def login_user(user_type: str, creds: UserLogin):
-        if user_type not in users:
-            raise HTTPException(status_code=400, detail="Invalid user type")
-        user = users[user_type].get(creds.email)
-        if not user or user["password"] != creds.password:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        return {"message": f"{user_type.title()} logged in", "profile": user["profile"]}
-
-    @app.get("/profile/{user_type}/{email}")
-    def get_profile(user_type: str, email: str):
-        if user_type not in users:
-            raise HTTPException(status_code=400, detail="Invalid user type")
-        user = users[user_type].get(email)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user["profile"]
-
-    @app.put("/profile/{user_type}/{email}")
-    def update_profile(user_type: str, email: str, profile: UserProfile):
-        if user_type not in users:
-            raise HTTPException(status_code=400, detail="Invalid user type")
-        user = users[user_type].get(email)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        if profile.name is not None:
-            user["profile"]["name"] = profile.name
-        if profile.bio is not None:
-            user["profile"]["bio"] = profile.bio
-        return {"message": "Profile updated", "profile": user["profile"]}
-
-    @app.put("/change-password/{user_type}/{email}")
-    def change_password(user_type: str, email: str, data: UserLogin):
-        if user_type not in users:
-            raise HTTPException(status_code=400, detail="Invalid user type")
-        user = users[user_type].get(email)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        if user["password"] != data.password:
-            raise HTTPException(status_code=401, detail="Current password incorrect")
-        user["password"] = data.name  # Here, 'name' field is used for new password
-        return {"message": "Password changed"}
     "Chess Club": {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        "participants": {"michael@mergington.edu", "daniel@mergington.edu"}
     },
     "Programming Class": {
         "description": "Learn programming fundamentals and build software projects",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
         "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+        "participants": {"emma@mergington.edu", "sophia@mergington.edu"}
     },
     "Gym Class": {
         "description": "Physical education and sports activities",
         "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
         "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+        "participants": {"john@mergington.edu", "olivia@mergington.edu"}
     },
     "Soccer Team": {
         "description": "Join the school soccer team and compete in matches",
         "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
         "max_participants": 22,
-        "participants": ["liam@mergington.edu", "noah@mergington.edu"]
+        "participants": {"liam@mergington.edu", "noah@mergington.edu"}
     },
     "Basketball Team": {
         "description": "Practice and play basketball with the school team",
         "schedule": "Wednesdays and Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 15,
-        "participants": ["ava@mergington.edu", "mia@mergington.edu"]
+        "participants": {"ava@mergington.edu", "mia@mergington.edu"}
     },
     "Art Club": {
         "description": "Explore your creativity through painting and drawing",
         "schedule": "Thursdays, 3:30 PM - 5:00 PM",
         "max_participants": 15,
-        "participants": ["amelia@mergington.edu", "harper@mergington.edu"]
+        "participants": {"amelia@mergington.edu", "harper@mergington.edu"}
     },
     "Drama Club": {
         "description": "Act, direct, and produce plays and performances",
         "schedule": "Mondays and Wednesdays, 4:00 PM - 5:30 PM",
         "max_participants": 20,
-        "participants": ["ella@mergington.edu", "scarlett@mergington.edu"]
+        "participants": {"ella@mergington.edu", "scarlett@mergington.edu"}
     },
     "Math Club": {
         "description": "Solve challenging problems and participate in math competitions",
         "schedule": "Tuesdays, 3:30 PM - 4:30 PM",
         "max_participants": 10,
-        "participants": ["james@mergington.edu", "benjamin@mergington.edu"]
+        "participants": {"james@mergington.edu", "benjamin@mergington.edu"}
     },
     "Debate Team": {
         "description": "Develop public speaking and argumentation skills",
         "schedule": "Fridays, 4:00 PM - 5:30 PM",
         "max_participants": 12,
-        "participants": ["charlotte@mergington.edu", "henry@mergington.edu"]
+        "participants": {"charlotte@mergington.edu", "henry@mergington.edu"}
     }
 }
 
+# Activity names are a small fixed set, so intern them once at load time
+activities = {sys.intern(name): details for name, details in activities.items()}
+
+# Read-only view handed to read paths; only signup/unregister mutate activities
+activities_view = MappingProxyType(activities)
+
+
+def _build_participant_index():
+    """Map each participant email to the names of the activities they joined"""
+    index = defaultdict(set)
+    for activity_name, details in activities.items():
+        for email in details["participants"]:
+            index[email].add(activity_name)
+    return index
+
+
+# Reverse index: participant email -> names of the activities they joined
+participant_index = _build_participant_index()
+
+# Per-activity locks serialize writers to the same activity. The write
+# paths contain no await today, so on one event loop they never contend;
+# they are defensive, for when a write path starts awaiting. Reads stay
+# lock-free since seeing a just-added participant is harmless.
+activity_locks = {name: asyncio.Lock() for name in activities}
+
+# Shared error instances for the activity endpoints; they carry no
+# per-request state. Raise them via with_traceback(None) so the reused
+# instance does not accumulate tracebacks across requests.
+_ERR_ACTIVITY_NOT_FOUND = HTTPException(status_code=404, detail="Activity not found")
+_ERR_ALREADY_SIGNED_UP = HTTPException(status_code=400,
+                                       detail="Student is already signed up")
+_ERR_NOT_SIGNED_UP = HTTPException(status_code=400,
+                                   detail="Student is not signed up for this activity")
+
+# Encoded /activities body, rebuilt only after a signup or unregister
+_activities_cache = None
+_dirty = True
+
+
+def _encode_default(obj):
+    """orjson fallback for the read-only view and participant sets"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    if isinstance(obj, set):
+        return sorted(obj)
+    raise TypeError
+
+
+class RequestModel(BaseModel):
+    """Base for request bodies; these are validated once at the boundary"""
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=False,
+                              validate_assignment=False)
+
+
+class UserRegister(RequestModel):
+    email: str
+    name: str
+    password: str
+
+
+class UserLogin(RequestModel):
+    email: str
+    password: str
 
+
+class PasswordChange(RequestModel):
+    password: str
+    new_password: str
+
+
+class UserProfile(RequestModel):
+    name: Optional[str] = None
+    bio: Optional[str] = None
+
+
+class BatchSignup(RequestModel):
+    email: str
+    activity_names: list[str]
+
+
+# --- Page & Static Files ---
+# Declared ahead of the API routes so page loads match first
 @app.get("/")
-def root():
+async def root():
     return RedirectResponse(url="/static/index.html")
 
 
+def _static_not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    """Match conditional request headers the same way Starlette's StaticFiles does"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip(" W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = parsedate(request.headers.get("if-modified-since", ""))
+    return (if_modified_since is not None
+            and if_modified_since >= parsedate(last_modified))
+
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_static_file(path: str, request: Request):
+    """Serve a static asset from memory"""
+    if path == "" or path.endswith("/"):
+        path += "index.html"
+    entry = static_bytes.get(path)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    content, ctype, etag, last_modified = entry
+    headers = {"Cache-Control": STATIC_CACHE_CONTROL, "ETag": etag,
+               "Last-Modified": last_modified}
+    if _static_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(len(content))
+        return Response(media_type=ctype, headers=headers)
+    return Response(content=content, media_type=ctype, headers=headers)
+
+
+# --- Activity Endpoints ---
+# Declared before the auth routes so the hottest paths match first
 @app.get("/activities")
-def get_activities():
-    return activities
+async def get_activities():
+    global _activities_cache, _dirty
+    if _dirty:
+        # Participants are stored as sets; emit them as sorted JSON arrays
+        _activities_cache = orjson.dumps(activities_view, default=_encode_default)
+        _dirty = False
+    return Response(content=_activities_cache, media_type="application/json")
 
 
-@app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str):
-    """Sign up a student for an activity"""
+@app.get("/users/{email}/activities")
+async def get_user_activities(email: str):
+    """List the activities a student is signed up for"""
+    return sorted(participant_index.get(email, ()))
+
+
+async def _add_participant(activity_name: str, email: str):
+    """Add a student to an activity, raising the shared HTTPException on failure"""
+    global _dirty
     # Validate activity exists
     if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+        raise _ERR_ACTIVITY_NOT_FOUND.with_traceback(None)
 
     # Get the specific activity
     activity = activities[activity_name]
 
-    # Validate student is not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(
-            status_code=400,
-            detail="Student is already signed up"
-        )
+    async with activity_locks[activity_name]:
+        # Validate student is not already signed up
+        if email in activity["participants"]:
+            raise _ERR_ALREADY_SIGNED_UP.with_traceback(None)
+
+        # Add student
+        activity["participants"].add(email)
+        participant_index[email].add(activity_name)
+        _dirty = True
 
-    # Add student
-    activity["participants"].append(email)
+
+@app.post("/activities/signup-batch")
+async def signup_for_activities(batch: BatchSignup):
+    """Sign up a student for several activities in one request"""
+    succeeded = []
+    failed = []
+    for activity_name in batch.activity_names:
+        try:
+            await _add_participant(activity_name, batch.email)
+        except HTTPException as exc:
+            failed.append({"activity": activity_name, "detail": exc.detail})
+        else:
+            succeeded.append(activity_name)
+    return {"succeeded": succeeded, "failed": failed}
+
+
+@app.post("/activities/{activity_name}/signup")
+async def signup_for_activity(activity_name: str, email: str):
+    """Sign up a student for an activity"""
+    # `email` arrives as a plain str query param and is used as-is as the
+    # participant key; no normalisation happens here.
+    await _add_participant(activity_name, email)
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
-@app.delete("/activities/{activity_name}/unregister")
-def unregister_from_activity(activity_name: str, email: str):
+@app.delete("/activities/{activity_name}/unregister", status_code=204)
+async def unregister_from_activity(activity_name: str, email: str):
     """Unregister a student from an activity"""
+    global _dirty
     # Validate activity exists
     if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+        raise _ERR_ACTIVITY_NOT_FOUND.with_traceback(None)
 
     # Get the specific activity
     activity = activities[activity_name]
 
-    # Validate student is signed up
-    if email not in activity["participants"]:
-        raise HTTPException(
-            status_code=400,
-            detail="Student is not signed up for this activity"
-        )
+    async with activity_locks[activity_name]:
+        # Validate student is signed up
+        if email not in activity["participants"]:
+            raise _ERR_NOT_SIGNED_UP.with_traceback(None)
+
+        # Remove student
+        activity["participants"].remove(email)
+        joined = participant_index[email]
+        joined.discard(activity_name)
+        if not joined:
+            # Drop emptied entries so the index only holds current participants
+            del participant_index[email]
+        _dirty = True
+    return Response(status_code=204)
+
+
+# --- Authentication & Profile Endpoints ---
+@app.post("/register/{user_type}")
+async def register_user(user_type: UserType, user: UserRegister):
+    bucket = _users_bucket(user_type)
+    if user.email in bucket:
+        raise HTTPException(status_code=400, detail="User already exists")
+    bucket[user.email] = {
+        "name": user.name,
+        "password": hash_password(user.password),
+        "profile": {"name": user.name, "bio": ""}
+    }
+    return {"message": f"{user_type.title()} registered successfully"}
+
+
+@app.post("/login/{user_type}")
+async def login_user(user_type: UserType, creds: UserLogin):
+    user = _users_bucket(user_type).get(creds.email)
+    if not user or not check_password(creds.password, user["password"]):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    return {"message": f"{user_type.title()} logged in", "profile": user["profile"]}
+
+
+@app.get("/profile/{user_type}/{email}")
+async def get_profile(user_type: UserType, email: str):
+    user = _users_bucket(user_type).get(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user["profile"]
+
+
+@app.put("/profile/{user_type}/{email}")
+async def update_profile(user_type: UserType, email: str, profile: UserProfile):
+    user = _users_bucket(user_type).get(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if profile.name is not None:
+        user["profile"]["name"] = profile.name
+    if profile.bio is not None:
+        user["profile"]["bio"] = profile.bio
+    return {"message": "Profile updated", "profile": user["profile"]}
+
 
-    # Remove student
-    activity["participants"].remove(email)
-    return {"message": f"Unregistered {email} from {activity_name}"}
+@app.put("/change-password/{user_type}/{email}")
+async def change_password(user_type: UserType, email: str, data: PasswordChange):
+    user = _users_bucket(user_type).get(email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not check_password(data.password, user["password"]):
+        raise HTTPException(status_code=401, detail="Current password incorrect")
+    user["password"] = hash_password(data.new_password)
+    return {"message": "Password changed"}
@@ -83,15 +83,15 @@ document.addEventListener("DOMContentLoaded", () => {
         }
       );
 
-      const result = await response.json();
-
       if (response.ok) {
-        messageDiv.textContent = result.message;
+        // Success is signalled by 204 No Content, so there is no body to read
+        messageDiv.textContent = `Unregistered ${email} from ${activity}`;
         messageDiv.className = "success";
 
         // Refresh activities list to show updated participants
         fetchActivities();
       } else {
+        const result = await response.json();
         messageDiv.textContent = result.detail || "An error occurred";
         messageDiv.className = "error";
       }